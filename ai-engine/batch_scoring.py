@@ -1,15 +1,22 @@
 import os
 import logging
 import joblib
+import numpy as np
 import pandas as pd
 import psycopg2
-import re
+import sys
+import time
+import urllib.request
 from decimal import Decimal
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
 # Import Feature Engineering
 from prediction_feature_engineering import apply_feature_engineering
+from feature_schema import (
+    IDR_TO_EUR_RATE, JOB_MAP, MARITAL_MAP, MONTHS, EDUCATION_MAP, POUTCOME_MAP,
+    CONTACT_TYPES, detect_contact_type,
+)
 
 load_dotenv()
 
@@ -20,9 +27,17 @@ logging.basicConfig(
 logger = logging.getLogger("batch-scorer")
 
 DB_URL = os.getenv("DATABASE_URL")
+AI_SERVICE_URL = os.getenv("AI_SERVICE_URL", "localhost:5000")
+AI_SERVICE_SECRET = os.getenv("AI_SERVICE_SECRET", "default_secret")
 MODEL_PATH = "model.pkl"
 PREPROCESSOR_PATH = "preprocessor.pkl"
-BATCH_SIZE = 1000
+
+# Batch size di-tune otomatis saat runtime (lihat BatchSizer)
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 1000))               # ukuran awal
+BATCH_SIZE_MIN = int(os.getenv("BATCH_SIZE_MIN", 200))
+BATCH_SIZE_MAX = int(os.getenv("BATCH_SIZE_MAX", 20000))
+BATCH_TARGET_SECONDS = float(os.getenv("BATCH_TARGET_SECONDS", 5.0))
+BATCH_MAX_RSS_MB = float(os.getenv("BATCH_MAX_RSS_MB", 1024))
 
 def get_db_connection():
     try:
@@ -40,94 +55,193 @@ def load_artifacts():
         preprocessor = joblib.load(PREPROCESSOR_PATH)
     return model, preprocessor
 
-def detect_contact_type(nomor: str | None) -> str:
-    if not nomor:
-        return "unknown"
-    nomor = str(nomor).replace(" ", "").replace("-", "")
-    if re.match(r"^(?:\+?628|08)\d+$", nomor):
-        return "cellular"
-    if re.match(r"^0[2-9]\d{7,11}$", nomor):
-        return "telephone"
-    return "unknown"
+def get_peak_rss_mb():
+    """Puncak RSS proses (MB) dari ru_maxrss."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
 
-def prepare_features_from_db(rows):
+def get_rss_mb():
+    """RSS proses saat ini (MB). Fallback ke puncak RSS jika /proc tidak tersedia."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return get_peak_rss_mb()
+
+class BatchSizer:
     """
-    Mapping hasil Query Database Kompleks ke Format DataFrame Model.
+    Menentukan ukuran batch berikutnya dari latency dan throughput batch terakhir.
+
+    Target: satu batch selesai dalam ~target_seconds. Pertumbuhan dibatasi 2x
+    per langkah (turun maksimal 0.5x) agar tidak berosilasi.
+
+    Guard memori memakai kenaikan RSS per batch, bukan RSS absolut: memori yang
+    sudah dibebaskan jarang dikembalikan ke OS, jadi RSS tetap tinggi walau batch
+    mengecil. Ukuran dipotong setengah hanya jika RSS di atas max_rss_mb *dan*
+    masih naik. Ukuran hingga batch terbesar yang sudah pernah jalan tidak butuh
+    memori baru; di atas itu pertumbuhan dibatasi headroom / MB-per-baris.
     """
 
-    # Mapping
-    job_map = {
-        "PNS": "admin.", "Wiraswasta": "entrepreneur", "Ibu Rumah Tangga": "housemaid",
-        "Manager": "management", "Pensiunan": "retired", "Mahasiswa": "student",
-        "Buruh": "blue-collar", "Tidak Bekerja": "unemployed"
-    }
-    marital_map = {
-        "MENIKAH": "married", "BELUM MENIKAH": "single",
-        "CERAI-HIDUP": "divorced", "CERAI-MATI": "divorced",
-        "Menikah": "married", "Belum Menikah": "single", "Cerai": "divorced"
-    }
-    month_map = {
-        1: "jan", 2: "feb", 3: "mar", 4: "apr",
-        5: "may", 6: "jun", 7: "jul", 8: "aug",
-        9: "sep", 10: "oct", 11: "nov", 12: "dec"
-    }
-    education_map = {
-        "SD": "primary", "SMP": "secondary", "SMA": "secondary",
-        "S1": "tertiary", "S2": "tertiary", "S3": "tertiary",
-    }
-    poutcome_map = {
-        "TERTARIK": "success", "TIDAK TERTARIK": "failure",
-    }
-
-    data = []
-    for row in rows:
-        # Unpack tuple (Perhatikan urutan SELECT di query bawah)
-        # Saya menambahkan 'nama' di index ke-1
-        (
-            id_nasabah, nama, umur, pekerjaan, pendidikan, id_status_pernikahan,
-            saldo, has_kpr, has_pinjaman, has_defaulted,
-            nomor_telepon,
-            last_call_date, campaign, previous, pdays, poutcome
-        ) = row
-
-        # --- safe casting ---
-        IDR_TO_EUR_RATE = 14000  # fixed, era 2008–2010
-
-        saldo_idr = float(saldo) if isinstance(saldo, (int, float, Decimal)) else 0.0
-        saldo_eur = saldo_idr / IDR_TO_EUR_RATE # Menyesuaikan ke data training asli dalam Euro
-        campaign_val = int(campaign or 0)
-        previous_val = int(previous or 0)
-        pdays_val = int(pdays) if pdays is not None else -1
-
-        # --- date handling ---
-        if last_call_date:
-            day = last_call_date.day
-            month = month_map.get(last_call_date.month, "may")
+    def __init__(self, initial=BATCH_SIZE, min_size=BATCH_SIZE_MIN, max_size=BATCH_SIZE_MAX,
+                 target_seconds=BATCH_TARGET_SECONDS, max_rss_mb=BATCH_MAX_RSS_MB, smoothing=0.5,
+                 baseline_rss_mb=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_rss_mb = max_rss_mb
+        self.smoothing = smoothing
+        self.size = self._clamp(initial)
+        self.rows_per_sec = None
+        self.last_rss_mb = baseline_rss_mb
+        self.mb_per_row = None
+        self.largest_rows = 0
+        self.history = []
+
+    def _clamp(self, size):
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def update(self, rows, stage_seconds, rss_mb):
+        """Catat hasil satu batch dan hitung ukuran batch berikutnya."""
+        elapsed = sum(stage_seconds.values())
+        rate = rows / elapsed if elapsed > 0 else float(self.max_size)
+
+        # EWMA agar satu batch yang lambat/cepat tidak langsung mengubah ukuran drastis
+        if self.rows_per_sec is None:
+            self.rows_per_sec = rate
         else:
-            day = 15
-            month = "may"
-
-        contact_type = detect_contact_type(nomor_telepon)
-
-        data.append({
-            "age": int(umur or 0),
-            "job": job_map.get(pekerjaan, "unknown"),
-            "marital": marital_map.get(id_status_pernikahan, "single"),
-            "balance": saldo_eur,
-            "education": education_map.get(pendidikan, "unknown"),
-            "default": "yes" if has_defaulted else "no",
-            "housing": "yes" if has_kpr else "no",
-            "loan": "yes" if has_pinjaman else "no",
-            "contact": contact_type,
-            "day": day,
-            "month": month,
-            "campaign": campaign_val,
-            "pdays": pdays_val,
-            "previous": previous_val,
-            "poutcome": poutcome_map.get(poutcome, "unknown")
+            self.rows_per_sec = self.smoothing * rate + (1 - self.smoothing) * self.rows_per_sec
+
+        self.history.append({
+            "size": self.size, "rows": rows, "seconds": elapsed,
+            "rows_per_sec": rate, "rss_mb": rss_mb, **stage_seconds,
         })
 
-    return pd.DataFrame(data)
+        growth = rss_mb - self.last_rss_mb if self.last_rss_mb is not None else 0.0
+        self.last_rss_mb = rss_mb
+        if growth > 0 and rows:
+            # Estimasi konservatif: kenaikan terbesar per baris yang pernah terlihat
+            self.mb_per_row = max(self.mb_per_row or 0.0, growth / rows)
+
+        self.largest_rows = max(self.largest_rows, rows)
+
+        if rss_mb > self.max_rss_mb and growth > 0:
+            # Di atas batas dan masih naik
+            proposed = self.size // 2
+        else:
+            proposed = self.rows_per_sec * self.target_seconds
+            proposed = min(proposed, self.size * 2)
+            proposed = max(proposed, self.size // 2)
+            if self.mb_per_row:
+                headroom = max(0.0, self.max_rss_mb - rss_mb)
+                proposed = min(proposed, self.largest_rows + headroom / self.mb_per_row)
+
+        self.size = self._clamp(proposed)
+        return self.size
+
+    def summary(self):
+        rows = sum(h["rows"] for h in self.history)
+        seconds = sum(h["seconds"] for h in self.history)
+        return {
+            "batches": len(self.history),
+            "rows": rows,
+            "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+            "sizes": [h["size"] for h in self.history],
+            "peak_rss_mb": max((h["rss_mb"] for h in self.history), default=0.0),
+        }
+
+def notify_ranking_refresh():
+    """Minta ai-api memuat ulang score index setelah skor baru ditulis ke DB."""
+    base_url = AI_SERVICE_URL if "://" in AI_SERVICE_URL else f"http://{AI_SERVICE_URL}"
+    req = urllib.request.Request(
+        f"{base_url.rstrip('/')}/leads/ranking/refresh",
+        method="POST",
+        headers={"x-token": AI_SERVICE_SECRET},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            logger.info(f"🔁 Score index ai-api di-refresh (HTTP {resp.status})")
+    except Exception as e:
+        # Tidak fatal: skor sudah tersimpan, index ter-refresh di run/restart berikutnya
+        logger.warning(f"Gagal refresh score index ai-api: {e}")
+
+# Urutan kolom hasil SELECT di query batch (lihat run_batch_scoring)
+DB_COLUMNS = (
+    "id_nasabah", "nama", "umur", "pekerjaan", "pendidikan", "id_status_pernikahan",
+    "saldo", "has_kpr", "has_pinjaman", "has_defaulted",
+    "nomor_telepon",
+    "last_call_date", "campaign", "previous", "pdays", "poutcome",
+)
+_COLUMN_INDEX = {name: i for i, name in enumerate(DB_COLUMNS)}
+
+def _column(rows, name):
+    idx = _COLUMN_INDEX[name]
+    return (row[idx] for row in rows)
+
+def _categorical(values, mapping, default, n):
+    """
+    Mapping nilai mentah langsung ke kode kategori (int8),
+    tanpa membuat kolom string object di tengah jalan.
+    """
+    categories = list(dict.fromkeys([*mapping.values(), default]))
+    code_of = {cat: i for i, cat in enumerate(categories)}
+    raw_to_code = {raw: code_of[mapped] for raw, mapped in mapping.items()}
+    default_code = code_of[default]
+    codes = np.fromiter(
+        (raw_to_code.get(v, default_code) for v in values), dtype=np.int8, count=n
+    )
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def _flag(values, n):
+    return np.fromiter((1 if v else 0 for v in values), dtype=np.int8, count=n)
+
+def _saldo_eur(saldo):
+    saldo_idr = float(saldo) if isinstance(saldo, (int, float, Decimal)) else 0.0
+    return saldo_idr / IDR_TO_EUR_RATE # Menyesuaikan ke data training asli dalam Euro
+
+def prepare_features_from_db(rows):
+    """
+    Mapping hasil Query Database Kompleks ke Format DataFrame Model.
+
+    Frame dibangun per kolom dengan dtype ringkas: kategori untuk kolom
+    string, int8 untuk flag yes/no (sudah 0/1), int32 untuk hitungan.
+    """
+    n = len(rows)
+
+    # --- date handling (default: tanggal 15 Mei) ---
+    last_calls = [row[_COLUMN_INDEX["last_call_date"]] for row in rows]
+    day = np.fromiter((d.day if d else 15 for d in last_calls), dtype=np.int8, count=n)
+    month_codes = np.fromiter(
+        (d.month - 1 if d else MONTHS.index("may") for d in last_calls), dtype=np.int8, count=n
+    )
+    del last_calls
+
+    contact_codes = np.fromiter(
+        (CONTACT_TYPES.index(detect_contact_type(v)) for v in _column(rows, "nomor_telepon")),
+        dtype=np.int8, count=n
+    )
+
+    return pd.DataFrame({
+        "age": np.fromiter((int(v or 0) for v in _column(rows, "umur")), dtype=np.int32, count=n),
+        "job": _categorical(_column(rows, "pekerjaan"), JOB_MAP, "unknown", n),
+        "marital": _categorical(_column(rows, "id_status_pernikahan"), MARITAL_MAP, "single", n),
+        "balance": np.fromiter((_saldo_eur(v) for v in _column(rows, "saldo")), dtype=np.float64, count=n),
+        "education": _categorical(_column(rows, "pendidikan"), EDUCATION_MAP, "unknown", n),
+        "default": _flag(_column(rows, "has_defaulted"), n),
+        "housing": _flag(_column(rows, "has_kpr"), n),
+        "loan": _flag(_column(rows, "has_pinjaman"), n),
+        "contact": pd.Categorical.from_codes(contact_codes, categories=CONTACT_TYPES),
+        "day": day,
+        "month": pd.Categorical.from_codes(month_codes, categories=MONTHS),
+        "campaign": np.fromiter((int(v or 0) for v in _column(rows, "campaign")), dtype=np.int32, count=n),
+        "pdays": np.fromiter(
+            (int(v) if v is not None else -1 for v in _column(rows, "pdays")), dtype=np.int32, count=n
+        ),
+        "previous": np.fromiter((int(v or 0) for v in _column(rows, "previous")), dtype=np.int32, count=n),
+        "poutcome": _categorical(_column(rows, "poutcome"), POUTCOME_MAP, "unknown", n),
+    }, copy=False)
 
 def run_batch_scoring():
     logger.info("🚀 Memulai Batch Scoring (Logic Database Baru)...")
@@ -145,6 +259,11 @@ def run_batch_scoring():
         return
 
     total_processed = 0
+    sizer = BatchSizer(baseline_rss_mb=get_rss_mb())
+    logger.info(
+        f"⚙️ Batch size awal {sizer.size} (min {sizer.min_size}, max {sizer.max_size}, "
+        f"target {sizer.target_seconds}s/batch, RSS maks {sizer.max_rss_mb} MB)"
+    )
 
     try:
         while True:
@@ -243,8 +362,13 @@ def run_batch_scoring():
                 LIMIT %s;
             """
 
-            cursor.execute(query, (BATCH_SIZE,))
+            batch_size = sizer.size
+            stages = {}
+
+            t0 = time.perf_counter()
+            cursor.execute(query, (batch_size,))
             rows = cursor.fetchall()
+            stages["fetch"] = time.perf_counter() - t0
 
             if not rows:
                 logger.info("✅ Tidak ada data baru.")
@@ -254,12 +378,16 @@ def run_batch_scoring():
 
             try:
                 # 1. Pipeline Data & FE
+                t0 = time.perf_counter()
                 df_raw = prepare_features_from_db(rows)
-                df_fe = apply_feature_engineering(df_raw)
+                df_fe = apply_feature_engineering(df_raw, inplace=True)
+                stages["prepare"] = time.perf_counter() - t0
 
                 # 2. Preprocess & Predict
+                t0 = time.perf_counter()
                 X_processed = preprocessor.transform(df_fe)
                 probabilities = model.predict_proba(X_processed)[:, 1]
+                stages["predict"] = time.perf_counter() - t0
 
             except Exception as e:
                 logger.error(f"❌ Error Pipeline: {e}")
@@ -268,6 +396,7 @@ def run_batch_scoring():
                 break
 
             # 3. Update DB & Logging Per Line
+            t0 = time.perf_counter()
             update_values = []
             for i, prob in enumerate(probabilities):
                 skor_final = float(prob)
@@ -289,17 +418,34 @@ def run_batch_scoring():
             """
             execute_values(cursor, update_query, update_values)
             conn.commit()
+            stages["update"] = time.perf_counter() - t0
 
             total_processed += len(rows)
-            logger.info(f"✨ Batch selesai. Total: {total_processed}")
+            rss_mb = get_rss_mb()
+            next_size = sizer.update(len(rows), stages, rss_mb)
+            stage_log = " | ".join(f"{k} {v:.2f}s" for k, v in stages.items())
+            logger.info(
+                f"✨ Batch selesai. Total: {total_processed} | size {batch_size} | {stage_log} | "
+                f"{sizer.history[-1]['rows_per_sec']:.0f} rows/s | RSS {rss_mb:.0f} MB | next size {next_size}"
+            )
 
     except Exception as e:
         conn.rollback()
         logger.error(f"❌ Critical Error: {e}")
     finally:
+        if sizer.history:
+            run = sizer.summary()
+            logger.info(
+                f"📈 Ringkasan run: {run['rows']} baris dalam {run['batches']} batch | "
+                f"{run['rows_per_sec']:.0f} rows/s | RSS puncak {run['peak_rss_mb']:.0f} MB | "
+                f"batch sizes {run['sizes']}"
+            )
         if cursor: cursor.close()
         if conn: conn.close()
         logger.info("🔌 Koneksi database ditutup.")
 
+    if total_processed > 0:
+        notify_ranking_refresh()
+
 if __name__ == "__main__":
     run_batch_scoring()
@@ -0,0 +1,94 @@
+import argparse
+import datetime as dt
+import json
+import os
+import random
+import subprocess
+import sys
+import uuid
+from decimal import Decimal
+
+# Batas puncak RSS (MB) untuk prepare + feature engineering per 100k baris
+MEMORY_BUDGET_MB = 40
+BENCH_ROWS = 100_000
+
+def make_rows(n, seed=42):
+    """
+    Buat baris sintetis dengan urutan kolom yang sama seperti SELECT di batch scoring.
+    """
+    rnd = random.Random(seed)
+    jobs = ["PNS", "Wiraswasta", "Ibu Rumah Tangga", "Manager", "Pensiunan",
+            "Mahasiswa", "Buruh", "Tidak Bekerja", "Programmer", None]
+    maritals = ["MENIKAH", "BELUM MENIKAH", "CERAI-HIDUP", "CERAI-MATI", None]
+    educations = ["SD", "SMP", "SMA", "S1", "S2", "S3", None]
+    poutcomes = ["TERTARIK", "TIDAK TERTARIK", None]
+    phones = ["081234567890", "+6281298765432", "0215551234", "12345", None]
+
+    rows = []
+    for _ in range(n):
+        has_call = rnd.random() < 0.7
+        rows.append((
+            str(uuid.UUID(int=rnd.getrandbits(128))),
+            f"Nasabah {rnd.randrange(10**6)}",
+            rnd.randint(18, 90),
+            rnd.choice(jobs),
+            rnd.choice(educations),
+            rnd.choice(maritals),
+            Decimal(rnd.randint(-5_000_000, 500_000_000)),
+            rnd.random() < 0.5,
+            rnd.random() < 0.2,
+            rnd.random() < 0.05,
+            rnd.choice(phones),
+            dt.datetime(2025, rnd.randint(1, 12), rnd.randint(1, 28)) if has_call else None,
+            rnd.randint(1, 10) if has_call else 0,
+            rnd.randint(0, 5) if has_call else 0,
+            Decimal(rnd.randint(1, 400)) if has_call and rnd.random() < 0.5 else -1,
+            rnd.choice(poutcomes),
+        ))
+    return rows
+
+def measure(n_rows):
+    """
+    Ukur kenaikan puncak RSS saat membangun frame + feature engineering.
+    Harus dijalankan di proses baru agar ru_maxrss tidak tercemar run sebelumnya.
+    """
+    from batch_scoring import get_peak_rss_mb, prepare_features_from_db
+    from prediction_feature_engineering import apply_feature_engineering
+
+    rows = make_rows(n_rows)
+    baseline = get_peak_rss_mb()
+
+    df = prepare_features_from_db(rows)
+    df = apply_feature_engineering(df, inplace=True)
+
+    peak = get_peak_rss_mb()
+    return {
+        "rows": n_rows,
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak, 1),
+        "batch_peak_mb": round(peak - baseline, 1),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / (1024 * 1024), 1),
+    }
+
+def run_isolated(n_rows=BENCH_ROWS):
+    """Jalankan measure() di subprocess dan kembalikan hasilnya."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--rows", str(n_rows), "--json"],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark memori batch scoring")
+    parser.add_argument("--rows", type=int, default=BENCH_ROWS)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result = measure(args.rows)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"📊 {result['rows']} baris")
+        print(f"   >> Puncak RSS batch : {result['batch_peak_mb']} MB (budget {MEMORY_BUDGET_MB} MB per 100k)")
+        print(f"   >> Ukuran frame     : {result['frame_mb']} MB")
@@ -0,0 +1,71 @@
+import argparse
+import datetime as dt
+import statistics
+import time
+import tracemalloc
+
+import joblib
+
+from feature_schema import FeatureSchema
+from main import NasabahPayload, PREPROCESSOR_PATH, MODEL_PATH
+# Jalur "before": prepare_features lama (dict -> DataFrame -> apply_feature_engineering)
+from test_feature_schema import legacy_prepare_features
+
+SAMPLE_PAYLOAD = NasabahPayload(
+    umur=35, pekerjaan="Wiraswasta", pendidikan="S1", status_pernikahan="MENIKAH",
+    saldo=25_000_000, has_kpr=True, has_pinjaman=False, has_defaulted=False,
+    last_call_date=dt.datetime(2025, 3, 12), campaign=2, previous=1, pdays=40,
+    poutcome="TIDAK TERTARIK", nomor_telepon="0812-3456-7890",
+)
+
+def measure(fn, repeat):
+    # Latency
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+
+    # Alokasi: puncak memori yang di-trace selama satu request
+    tracemalloc.start()
+    fn()
+    peaks = []
+    for _ in range(min(repeat, 50)):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        "p50_us": statistics.median(timings) * 1e6,
+        "p95_us": sorted(timings)[int(len(timings) * 0.95) - 1] * 1e6,
+        "alloc_kb": statistics.median(peaks) / 1024,
+    }
+
+def run(repeat):
+    preprocessor = joblib.load(PREPROCESSOR_PATH)
+    model = joblib.load(MODEL_PATH)
+    schema = FeatureSchema(getattr(preprocessor, "feature_names_in_", None))
+
+    def predict(frame_fn):
+        return lambda: model.predict_proba(preprocessor.transform(frame_fn()))[0, 1]
+
+    cases = {
+        "features / before": lambda: legacy_prepare_features(SAMPLE_PAYLOAD),
+        "features / after": lambda: schema.frame(SAMPLE_PAYLOAD),
+        "predict  / before": predict(lambda: legacy_prepare_features(SAMPLE_PAYLOAD)),
+        "predict  / after": predict(lambda: schema.frame(SAMPLE_PAYLOAD)),
+    }
+    return {name: measure(fn, repeat) for name, fn in cases.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark jalur /predict")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"📊 Microbenchmark /predict ({args.repeat} request)")
+    for name, r in run(args.repeat).items():
+        print(f"   >> {name:<18}: p50 {r['p50_us']:8.1f} us | p95 {r['p95_us']:8.1f} us | alloc {r['alloc_kb']:7.1f} KB/request")
@@ -0,0 +1,181 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+IDR_TO_EUR_RATE = 14000  # fixed, era 2008–2010
+
+# Mapping input user / DB ke format training model
+JOB_MAP = {
+    "PNS": "admin.", "Wiraswasta": "entrepreneur", "Ibu Rumah Tangga": "housemaid",
+    "Manager": "management", "Pensiunan": "retired", "Mahasiswa": "student",
+    "Buruh": "blue-collar", "Tidak Bekerja": "unemployed"
+}
+MARITAL_MAP = {
+    "MENIKAH": "married", "BELUM MENIKAH": "single",
+    "CERAI-HIDUP": "divorced", "CERAI-MATI": "divorced",
+    "Menikah": "married", "Belum Menikah": "single", "Cerai": "divorced" # Fallback
+}
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+EDUCATION_MAP = {
+    "SD": "primary", "SMP": "secondary", "SMA": "secondary",
+    "S1": "tertiary", "S2": "tertiary", "S3": "tertiary",
+}
+POUTCOME_MAP = {
+    "TERTARIK": "success", "TIDAK TERTARIK": "failure",
+}
+CONTACT_TYPES = ("cellular", "telephone", "unknown")
+
+# Mobile phone (HP) - dimulai 08 atau +628
+CELLULAR_PATTERN = re.compile(r"^(?:\+?628|08)\d+$")
+# Landline (Telepon rumah/kantor) - dimulai 02 sampai 09
+TELEPHONE_PATTERN = re.compile(r"^0[2-9]\d{7,11}$")
+
+def detect_contact_type(nomor: str | None) -> str:
+    if not nomor:
+        return "unknown"
+    nomor = str(nomor).replace(" ", "").replace("-", "")
+    if CELLULAR_PATTERN.match(nomor):
+        return "cellular"
+    if TELEPHONE_PATTERN.match(nomor):
+        return "telephone"
+    return "unknown"
+
+# Urutan output apply_feature_engineering (fallback jika preprocessor tidak punya feature_names_in_)
+FEATURE_COLUMNS = (
+    "age", "job", "marital", "balance", "education", "default", "housing", "loan",
+    "contact", "day", "month", "campaign", "pdays", "previous", "poutcome",
+    "balance_squared", "age_squared", "balance_per_age", "balance_age",
+    "contacted_before", "days_since_contact", "contact_frequency", "contact_intensity",
+    "frequent_campaign", "high_campaign", "previous_contact", "campaign_per_previous",
+    "age_group", "campaign_group", "has_positive_balance", "has_debt", "high_balance",
+    "balance_category", "total_loans", "any_loan", "no_loans", "high_success_month",
+    "young_professional", "retirement_age", "balance_x_contacted", "age_x_balance_pos",
+)
+
+# Bin pd.cut (right-inclusive) dari prediction_feature_engineering
+AGE_BINS = ((0, 30, 40, 50, 60, 100), ("young", "middle_young", "middle", "senior", "elderly"))
+CAMPAIGN_BINS = ((0, 1, 3, 5, 100), ("first", "low", "medium", "high"))
+BALANCE_BINS = ((-math.inf, 0, 500, 2000, math.inf), ("negative", "low", "medium", "high"))
+HIGH_SUCCESS_MONTHS = frozenset({"mar", "sep", "oct", "dec"})
+
+def _bucket(value, bins):
+    # Sama dengan pd.cut: (e0, e1], di luar rentang -> NaN
+    edges, labels = bins
+    i = bisect_left(edges, value)
+    if i == 0 or i == len(edges):
+        return np.nan
+    return labels[i - 1]
+
+def _div(x, y):
+    # Semantik pembagian numpy: x/0 -> ±inf, 0/0 -> NaN
+    if y == 0:
+        return math.copysign(math.inf, x) if x else math.nan
+    return x / y
+
+class FeatureSchema:
+    """
+    Skema fitur tetap untuk jalur online (/predict), dibangun sekali saat startup.
+
+    Menghitung fitur satu nasabah secara skalar (setara apply_feature_engineering
+    untuk 1 baris) langsung ke buffer object per-thread, yang di-view oleh
+    DataFrame 1 baris yang dipakai ulang. Tidak ada Series/DataFrame perantara.
+    """
+
+    def __init__(self, columns=None):
+        self.columns = pd.Index(list(columns) if columns is not None else FEATURE_COLUMNS)
+        if sorted(self.columns) != sorted(FEATURE_COLUMNS):
+            raise ValueError("Kolom preprocessor tidak cocok dengan FEATURE_COLUMNS")
+        self._positions = [self.columns.get_loc(c) for c in FEATURE_COLUMNS]
+        self._local = threading.local()
+
+    def _frame(self):
+        # Buffer + frame per thread: endpoint sync FastAPI jalan di threadpool
+        local = self._local
+        frame = getattr(local, "frame", None)
+        if frame is None:
+            local.row = np.empty((1, len(self.columns)), dtype=object)
+            frame = local.frame = pd.DataFrame(local.row, columns=self.columns, copy=False)
+        return local.row[0], frame
+
+    def values(self, payload):
+        """Nilai fitur dalam urutan FEATURE_COLUMNS."""
+        age = payload.umur
+        saldo_idr = float(payload.saldo) if isinstance(payload.saldo, (int, float, Decimal)) else 0.0
+        balance = saldo_idr / IDR_TO_EUR_RATE # Menyesuaikan ke data training asli dalam Euro
+        default = 1 if payload.has_defaulted else 0
+        housing = 1 if payload.has_kpr else 0
+        loan = 1 if payload.has_pinjaman else 0
+
+        if payload.last_call_date:
+            day = payload.last_call_date.day
+            month = MONTHS[payload.last_call_date.month - 1]
+        else:
+            day = 15
+            month = "may"
+
+        campaign = payload.campaign
+        pdays = payload.pdays
+        previous = payload.previous
+
+        contacted_before = 1 if pdays != -1 else 0
+        days_since_contact = 365 if pdays == -1 else pdays
+        has_positive_balance = 1 if balance > 0 else 0
+
+        return (
+            age,
+            JOB_MAP.get(payload.pekerjaan, "unknown"),
+            MARITAL_MAP.get(payload.status_pernikahan, "single"),
+            balance,
+            EDUCATION_MAP.get(payload.pendidikan, "unknown"),
+            default,
+            housing,
+            loan,
+            detect_contact_type(payload.nomor_telepon),
+            day,
+            month,
+            campaign,
+            pdays,
+            previous,
+            POUTCOME_MAP.get(payload.poutcome, "unknown"),
+            balance * balance,  # bukan ** 2: pow() bisa beda 1 ulp dari numpy
+            age ** 2,
+            _div(balance, age + 1),
+            balance * age,
+            contacted_before,
+            days_since_contact,
+            _div(previous, days_since_contact + 1),
+            _div(campaign, days_since_contact + 1),
+            1 if campaign > 3 else 0,
+            1 if campaign > 5 else 0,
+            1 if previous > 0 else 0,
+            _div(campaign, previous + 1),
+            _bucket(age, AGE_BINS),
+            _bucket(campaign, CAMPAIGN_BINS),
+            has_positive_balance,
+            1 if balance < 0 else 0,
+            0,  # high_balance: balance > quantile(0.75) selalu False untuk 1 baris
+            _bucket(balance, BALANCE_BINS),
+            housing + loan,
+            1 if housing == 1 or loan == 1 else 0,
+            1 if housing == 0 and loan == 0 else 0,
+            1 if month in HIGH_SUCCESS_MONTHS else 0,
+            1 if 25 <= age <= 40 else 0,
+            1 if age >= 60 else 0,
+            balance * contacted_before,
+            age * has_positive_balance,
+        )
+
+    def frame(self, payload) -> pd.DataFrame:
+        """
+        DataFrame 1 baris siap untuk preprocessor.transform.
+        Frame dipakai ulang per thread: jangan disimpan melewati satu request.
+        """
+        row, frame = self._frame()
+        for pos, value in zip(self._positions, self.values(payload)):
+            row[pos] = value
+        return frame
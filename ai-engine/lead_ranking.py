@@ -0,0 +1,124 @@
+import base64
+import datetime as dt
+from bisect import bisect_right
+
+import numpy as np
+
+# Sama dengan filter grade di backend (sales-operation.repository getAllLeads)
+SEGMENTS = ("A", "B", "C")
+
+def segment_of(score: float) -> str:
+    if score >= 0.75:
+        return "A"
+    if score >= 0.5:
+        return "B"
+    return "C"
+
+def encode_cursor(score: float, id_nasabah: str) -> str:
+    raw = f"{score!r}|{id_nasabah}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, id_nasabah = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return float(score), id_nasabah
+    except Exception as e:
+        raise ValueError("Cursor tidak valid") from e
+
+class _SortedScores:
+    """
+    Skor terurut menurun (tie-break: id_nasabah naik) dalam array numpy.
+    Dibangun sekali per refresh, setelah itu read-only.
+    """
+
+    def __init__(self, ids, scores):
+        order = np.lexsort((ids, -scores))
+        self.ids = ids[order]
+        self.neg_scores = -scores[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def start_after(self, score: float, id_nasabah: str) -> int:
+        # Seek ke posisi setelah (score, id) -> tetap valid walau index di-refresh
+        lo = int(np.searchsorted(self.neg_scores, -score, side="left"))
+        hi = int(np.searchsorted(self.neg_scores, -score, side="right"))
+        return bisect_right(self.ids, id_nasabah, lo, hi)
+
+    def page(self, start: int, limit: int):
+        ids = self.ids[start:start + limit]
+        scores = -self.neg_scores[start:start + limit]
+        return [
+            {"id_nasabah": i, "skor_prediksi": float(s), "segment": segment_of(s)}
+            for i, s in zip(ids.tolist(), scores.tolist())
+        ]
+
+class LeadRankingIndex:
+    """
+    Index skor in-memory untuk ranking lead (top-K per segment).
+
+    rebuild() membangun snapshot baru lalu menukarnya sekaligus, sehingga
+    query yang sedang berjalan tetap membaca snapshot lama secara konsisten.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self.refreshed_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def rebuild(self, rows):
+        """rows: iterable (id_nasabah, skor_prediksi)."""
+        ids, scores = [], []
+        for id_nasabah, score in rows:
+            if score is None:
+                continue
+            ids.append(str(id_nasabah))
+            scores.append(float(score))
+
+        ids = np.array(ids, dtype=object)
+        scores = np.array(scores, dtype=np.float64)
+
+        snapshot = {None: _SortedScores(ids, scores)}
+        segments = np.array([segment_of(s) for s in scores.tolist()], dtype=object)
+        for seg in SEGMENTS:
+            mask = segments == seg
+            snapshot[seg] = _SortedScores(ids[mask], scores[mask])
+
+        self._snapshot = snapshot
+        self.refreshed_at = dt.datetime.now(dt.timezone.utc)
+        return len(ids)
+
+    def load_from_db(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id_nasabah, skor_prediksi
+                FROM public.nasabah
+                WHERE deleted_at IS NULL AND skor_prediksi IS NOT NULL
+            """)
+            return self.rebuild(cursor.fetchall())
+
+    def top(self, limit: int, segment: str | None = None, cursor: str | None = None):
+        """
+        Ambil `limit` lead dengan skor tertinggi, opsional per segment.
+        Kembalikan (items, next_cursor, total); next_cursor None jika halaman terakhir.
+        """
+        if segment is not None and segment not in SEGMENTS:
+            raise ValueError(f"Segment harus salah satu dari {SEGMENTS}")
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return [], None, 0
+
+        ranked = snapshot[segment]
+        start = ranked.start_after(*decode_cursor(cursor)) if cursor else 0
+        items = ranked.page(start, limit)
+
+        next_cursor = None
+        if items and start + len(items) < len(ranked):
+            last = items[-1]
+            next_cursor = encode_cursor(last["skor_prediksi"], last["id_nasabah"])
+        return items, next_cursor, len(ranked)
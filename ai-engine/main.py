@@ -4,11 +4,10 @@ import secrets
 import joblib
 import pandas as pd
 import datetime as dt
-import re
-from decimal import Decimal
+import psycopg2
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -25,6 +24,7 @@ logging.basicConfig(
 logger = logging.getLogger("ai-api")
 
 API_SECRET = os.getenv("AI_SERVICE_SECRET", "default_secret")
+DB_URL = os.getenv("DATABASE_URL")
 
 BUNDLE_PATH = "bank_deposit_recommender_bundle.pkl"
 PREPROCESSOR_PATH = "preprocessor.pkl"
@@ -32,12 +32,13 @@ MODEL_PATH = "model.pkl"
 
 preprocessor = None
 model = None
+feature_schema = None
 
 # ==============================
 # COMMON: LOAD ARTIFACTS
 # ==============================
 def load_artifacts():
-    global preprocessor, model
+    global preprocessor, model, feature_schema
 
     if os.path.exists(BUNDLE_PATH):
         try:
@@ -63,16 +64,42 @@ def load_artifacts():
     if preprocessor is None or model is None:
         logger.critical("Failed to initialize preprocessor/model. Check your .pkl files!")
     else:
-        logger.info("Artifacts initialized successfully")
+        try:
+            feature_schema = FeatureSchema(getattr(preprocessor, "feature_names_in_", None))
+            logger.info("Artifacts initialized successfully")
+        except Exception as e:
+            feature_schema = None
+            logger.critical(f"Failed to build feature schema from preprocessor: {e}")
+
+# Import Feature Schema
+from feature_schema import FeatureSchema
+from lead_ranking import LeadRankingIndex, SEGMENTS
+
+# ==============================
+# LEAD RANKING INDEX
+# ==============================
+score_index = LeadRankingIndex()
 
-# Import Feature Engineering
-from prediction_feature_engineering import apply_feature_engineering
+def refresh_score_index():
+    """Muat ulang semua skor dari DB ke index in-memory."""
+    conn = psycopg2.connect(DB_URL)
+    try:
+        total = score_index.load_from_db(conn)
+    finally:
+        conn.close()
+    logger.info(f"Score index refreshed: {total} leads")
+    return total
 
 # ==============================
 # FASTAPI APP
 # ==============================
 async def lifespan(app: FastAPI):
     load_artifacts()
+    try:
+        refresh_score_index()
+    except Exception as e:
+        # API prediksi tetap jalan; index bisa diisi lewat /leads/ranking/refresh
+        logger.error(f"Failed to load score index: {e}")
     yield
 
 app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
@@ -99,77 +126,9 @@ class NasabahPayload(BaseModel):
 
     nomor_telepon: Optional[str] = None
 
-def detect_contact_type(nomor: str | None) -> str:
-    if not nomor:
-        return "unknown"
-
-    nomor = nomor.replace(" ", "").replace("-", "")
-
-    # Mobile phone (HP) - dimulai 08 atau +628
-    if re.match(r"^(?:\+?628|08)\d+$", nomor):
-        return "cellular"
-
-    # Landline (Telepon rumah/kantor) - dimulai 02 sampai 09
-    if re.match(r"^0[2-9]\d{7,11}$", nomor):
-        return "telephone"
-
-    return "unknown"
-
 def prepare_features(data: NasabahPayload) -> pd.DataFrame:
-    # Mapping input user ke format training model
-    job_map = {
-        "PNS": "admin.", "Wiraswasta": "entrepreneur", "Ibu Rumah Tangga": "housemaid",
-        "Manager": "management", "Pensiunan": "retired", "Mahasiswa": "student",
-        "Buruh": "blue-collar", "Tidak Bekerja": "unemployed"
-    }
-    marital_map = {
-        "MENIKAH": "married", "BELUM MENIKAH": "single",
-        "CERAI-HIDUP": "divorced", "CERAI-MATI": "divorced",
-        "Menikah": "married", "Belum Menikah": "single", "Cerai": "divorced" # Fallback
-    }
-    education_map = {
-        "SD": "primary", "SMP": "secondary", "SMA": "secondary",
-        "S1": "tertiary", "S2": "tertiary", "S3": "tertiary",
-    }
-    poutcome_map = {
-        "TERTARIK": "success", "TIDAK TERTARIK": "failure",
-    }
-
-    contact_type = detect_contact_type(data.nomor_telepon)
-
-    # Date handling
-    day = 15
-    month = "may"
-    if data.last_call_date:
-        day = data.last_call_date.day
-        month = data.last_call_date.strftime("%b").lower()
-
-    IDR_TO_EUR_RATE = 14000  # fixed, era 2008–2010
-
-    saldo_idr = float(data.saldo) if isinstance(data.saldo, (int, float, Decimal)) else 0.0
-    saldo_eur = saldo_idr / IDR_TO_EUR_RATE # Menyesuaikan ke data training asli dalam Euro
-
-    df_raw = pd.DataFrame([{
-        "age": data.umur,
-        "job": job_map.get(data.pekerjaan, "unknown"),
-        "marital": marital_map.get(data.status_pernikahan, "single"),
-        "balance": saldo_eur,
-        "education": education_map.get(data.pendidikan, "unknown"),
-        "default": "yes" if data.has_defaulted else "no",
-        "housing": "yes" if data.has_kpr else "no",
-        "loan": "yes" if data.has_pinjaman else "no",
-        "contact": contact_type,
-        "day": day,
-        "month": month,
-        "campaign": data.campaign,
-        "pdays": data.pdays,
-        "previous": data.previous,
-        "poutcome": poutcome_map.get(data.poutcome, "unknown")
-    }])
-
-    # Apply FE from external file
-    df_fe = apply_feature_engineering(df_raw)
-    return df_fe
+    # Skema fitur dibangun sekali saat startup (lihat load_artifacts)
+    return feature_schema.frame(data)
 
 # ==============================
 # API ENDPOINT
@@ -185,7 +144,7 @@ async def security_middleware(request: Request, call_next):
 
 @app.post("/predict")
 def predict(payload: NasabahPayload):
-    if model is None or preprocessor is None:
+    if model is None or preprocessor is None or feature_schema is None:
         raise HTTPException(status_code=503, detail="Model not initialized")
 
     try:
@@ -205,12 +164,46 @@ def predict(payload: NasabahPayload):
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail="Prediction failed")
 
+@app.get("/leads/ranking")
+def leads_ranking(
+    limit: int = Query(20, gt=0, le=500),
+    segment: Optional[str] = Query(None, description=f"Salah satu dari {SEGMENTS}"),
+    cursor: Optional[str] = None,
+):
+    if not score_index.ready:
+        raise HTTPException(status_code=503, detail="Score index not initialized")
+
+    try:
+        items, next_cursor, total = score_index.top(limit, segment=segment, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "status": "success",
+        "data": items,
+        "next_cursor": next_cursor,
+        "total": total,
+        "refreshed_at": score_index.refreshed_at,
+    }
+
+@app.post("/leads/ranking/refresh")
+def leads_ranking_refresh():
+    # Dipanggil oleh batch scorer setelah setiap run
+    try:
+        total = refresh_score_index()
+    except Exception as e:
+        logger.error(f"Score index refresh error: {e}")
+        raise HTTPException(status_code=500, detail="Score index refresh failed")
+
+    return {"status": "success", "total": total, "refreshed_at": score_index.refreshed_at}
+
 @app.get("/health")
 def health():
     return {
         "status": "ok",
         "model_loaded": (model is not None),
-        "preprocessor_loaded": (preprocessor is not None)
+        "preprocessor_loaded": (preprocessor is not None),
+        "score_index_loaded": score_index.ready
     }
 
 if __name__ == "__main__":
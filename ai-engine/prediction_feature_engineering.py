@@ -1,15 +1,26 @@
 import numpy as np
 import pandas as pd
 
-def apply_feature_engineering(df):
-    df_fe = df.copy()
+def apply_feature_engineering(df, inplace=False):
+    """
+    Tambahkan kolom fitur turunan ke DataFrame input model.
+
+    PENTING: jalur online (/predict) menghitung fitur yang sama secara skalar di
+    feature_schema.FeatureSchema.values. Setiap perubahan di sini harus diikuti
+    di sana (dijaga oleh test_feature_schema.py).
+
+    Dengan inplace=True kolom ditambahkan langsung ke `df` (tanpa copy),
+    dipakai oleh batch scoring untuk menekan puncak memori per batch.
+    """
+    df_fe = df if inplace else df.copy()
 
     # --------------------------------------------------
     # 1. Convert yes/no → 1/0 (MUST be done BEFORE FE)
     # --------------------------------------------------
     yes_no_cols = ["housing", "loan", "default", "y"]
     for col in yes_no_cols:
-        if col in df_fe.columns:
+        # Kolom yang sudah numerik (mis. int8 0/1 dari batch scoring) dilewati
+        if col in df_fe.columns and not pd.api.types.is_numeric_dtype(df_fe[col]):
             df_fe[col] = (
                 df_fe[col]
                 .astype(str)
@@ -30,15 +41,15 @@ def apply_feature_engineering(df):
     df_fe['balance_age'] = df_fe['balance'] * df_fe['age']
 
     # Contact history
-    df_fe['contacted_before'] = (df_fe['pdays'] != -1).astype(int)
-    df_fe['days_since_contact'] = df_fe['pdays'].apply(lambda x: 365 if x == -1 else x)
+    df_fe['contacted_before'] = (df_fe['pdays'] != -1).astype(np.int8)
+    df_fe['days_since_contact'] = df_fe['pdays'].where(df_fe['pdays'] != -1, 365)
     df_fe['contact_frequency'] = df_fe['previous'] / (df_fe['days_since_contact'] + 1)
     df_fe['contact_intensity'] = df_fe['campaign'] / (df_fe['days_since_contact'] + 1)
 
     # Campaign flags
-    df_fe['frequent_campaign'] = (df_fe['campaign'] > 3).astype(int)
-    df_fe['high_campaign'] = (df_fe['campaign'] > 5).astype(int)
-    df_fe['previous_contact'] = (df_fe['previous'] > 0).astype(int)
+    df_fe['frequent_campaign'] = (df_fe['campaign'] > 3).astype(np.int8)
+    df_fe['high_campaign'] = (df_fe['campaign'] > 5).astype(np.int8)
+    df_fe['previous_contact'] = (df_fe['previous'] > 0).astype(np.int8)
     df_fe['campaign_per_previous'] = df_fe['campaign'] / (df_fe['previous'] + 1)
 
     # Age groups
@@ -56,9 +67,9 @@ def apply_feature_engineering(df):
     )
 
     # Balance flags
-    df_fe['has_positive_balance'] = (df_fe['balance'] > 0).astype(int)
-    df_fe['has_debt'] = (df_fe['balance'] < 0).astype(int)
-    df_fe['high_balance'] = (df_fe['balance'] > df_fe['balance'].quantile(0.75)).astype(int)
+    df_fe['has_positive_balance'] = (df_fe['balance'] > 0).astype(np.int8)
+    df_fe['has_debt'] = (df_fe['balance'] < 0).astype(np.int8)
+    df_fe['high_balance'] = (df_fe['balance'] > df_fe['balance'].quantile(0.75)).astype(np.int8)
 
     df_fe['balance_category'] = pd.cut(
         df_fe['balance'],
@@ -68,22 +79,23 @@ def apply_feature_engineering(df):
 
     # Loan-related features
     df_fe['total_loans'] = df_fe['housing'] + df_fe['loan']
-    df_fe['any_loan'] = ((df_fe['housing'] == 1) | (df_fe['loan'] == 1)).astype(int)
-    df_fe['no_loans'] = ((df_fe['housing'] == 0) & (df_fe['loan'] == 0)).astype(int)
+    df_fe['any_loan'] = ((df_fe['housing'] == 1) | (df_fe['loan'] == 1)).astype(np.int8)
+    df_fe['no_loans'] = ((df_fe['housing'] == 0) & (df_fe['loan'] == 0)).astype(np.int8)
 
     # Month features
     high_success_months = ['mar', 'sep', 'oct', 'dec']
-    df_fe['high_success_month'] = df_fe['month'].isin(high_success_months).astype(int)
+    df_fe['high_success_month'] = df_fe['month'].isin(high_success_months).astype(np.int8)
 
     # Demographics
-    df_fe['young_professional'] = ((df_fe['age'] >= 25) & (df_fe['age'] <= 40)).astype(int)
-    df_fe['retirement_age'] = (df_fe['age'] >= 60).astype(int)
+    df_fe['young_professional'] = ((df_fe['age'] >= 25) & (df_fe['age'] <= 40)).astype(np.int8)
+    df_fe['retirement_age'] = (df_fe['age'] >= 60).astype(np.int8)
 
     # Interaction features
     df_fe['balance_x_contacted'] = df_fe['balance'] * df_fe['contacted_before']
     df_fe['age_x_balance_pos'] = df_fe['age'] * df_fe['has_positive_balance']
 
     # Drop if exists (safe)
-    df_fe = df_fe.drop(columns=['balance_to_avg_ratio'], errors='ignore')
+    if 'balance_to_avg_ratio' in df_fe.columns:
+        df_fe.drop(columns=['balance_to_avg_ratio'], inplace=True)
 
     return df_fe
@@ -0,0 +1,43 @@
+from batch_scoring import BatchSizer
+
+def test_batch_size_grows_towards_target_latency():
+    sizer = BatchSizer(initial=1000, min_size=100, max_size=50000, target_seconds=5.0, max_rss_mb=1024)
+
+    # 10k rows/s -> target 50k baris per batch, tapi naik maksimal 2x per langkah
+    sizes = [sizer.update(sizer.size, {"predict": sizer.size / 10_000}, rss_mb=200) for _ in range(8)]
+
+    assert sizes[:3] == [2000, 4000, 8000]
+    assert sizes[-1] == 50000
+
+def test_batch_size_shrinks_on_slow_batches_and_rss_growth():
+    sizer = BatchSizer(initial=8000, min_size=500, max_size=20000, target_seconds=1.0,
+                       max_rss_mb=512, baseline_rss_mb=200)
+
+    # Lambat: 8000 baris dalam 16s -> turun maksimal 0.5x
+    assert sizer.update(8000, {"fetch": 6.0, "predict": 10.0}, rss_mb=200) == 4000
+
+    # RSS naik melewati batas -> dipotong setengah walau throughput tinggi
+    assert sizer.update(4000, {"predict": 0.1}, rss_mb=900) == 2000
+
+    # Terus naik di atas batas -> turun sampai min_size
+    rss = 900
+    for _ in range(5):
+        rss += 50
+        sizer.update(sizer.size, {"predict": 0.01}, rss_mb=rss)
+    assert sizer.size == 500
+
+    run = sizer.summary()
+    assert run["batches"] == 7
+    assert run["peak_rss_mb"] == 1150
+
+def test_batch_size_recovers_when_rss_stops_growing():
+    sizer = BatchSizer(initial=8000, min_size=500, max_size=20000, target_seconds=1.0,
+                       max_rss_mb=512, baseline_rss_mb=200)
+    sizer.update(8000, {"predict": 0.4}, rss_mb=300)
+    assert sizer.update(16000, {"predict": 0.8}, rss_mb=700) == 8000
+
+    # RSS tetap tinggi (tidak dikembalikan ke OS) tapi stabil -> ukuran pulih
+    assert sizer.update(8000, {"predict": 0.4}, rss_mb=700) == 16000
+
+    # Di atas batas tanpa headroom: tidak tumbuh melewati batch terbesar yang sudah jalan
+    assert sizer.update(16000, {"predict": 0.1}, rss_mb=700) == 16000
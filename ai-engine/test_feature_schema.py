@@ -0,0 +1,179 @@
+import datetime as dt
+import random
+import re
+from decimal import Decimal
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_schema import FeatureSchema, detect_contact_type
+from main import NasabahPayload, PREPROCESSOR_PATH
+from prediction_feature_engineering import apply_feature_engineering
+
+def legacy_prepare_features(data: NasabahPayload) -> pd.DataFrame:
+    """
+    Referensi independen: prepare_features lama dari main.py (dict -> DataFrame ->
+    apply_feature_engineering), sengaja tidak memakai apa pun dari feature_schema.
+    """
+    job_map = {
+        "PNS": "admin.", "Wiraswasta": "entrepreneur", "Ibu Rumah Tangga": "housemaid",
+        "Manager": "management", "Pensiunan": "retired", "Mahasiswa": "student",
+        "Buruh": "blue-collar", "Tidak Bekerja": "unemployed"
+    }
+    marital_map = {
+        "MENIKAH": "married", "BELUM MENIKAH": "single",
+        "CERAI-HIDUP": "divorced", "CERAI-MATI": "divorced",
+        "Menikah": "married", "Belum Menikah": "single", "Cerai": "divorced"
+    }
+    education_map = {
+        "SD": "primary", "SMP": "secondary", "SMA": "secondary",
+        "S1": "tertiary", "S2": "tertiary", "S3": "tertiary",
+    }
+    poutcome_map = {
+        "TERTARIK": "success", "TIDAK TERTARIK": "failure",
+    }
+
+    contact_type = "unknown"
+    if data.nomor_telepon:
+        nomor = data.nomor_telepon.replace(" ", "").replace("-", "")
+        if re.match(r"^(?:\+?628|08)\d+$", nomor):
+            contact_type = "cellular"
+        elif re.match(r"^0[2-9]\d{7,11}$", nomor):
+            contact_type = "telephone"
+
+    day = 15
+    month = "may"
+    if data.last_call_date:
+        day = data.last_call_date.day
+        month = data.last_call_date.strftime("%b").lower()
+
+    saldo_idr = float(data.saldo) if isinstance(data.saldo, (int, float, Decimal)) else 0.0
+    saldo_eur = saldo_idr / 14000
+
+    df_raw = pd.DataFrame([{
+        "age": data.umur,
+        "job": job_map.get(data.pekerjaan, "unknown"),
+        "marital": marital_map.get(data.status_pernikahan, "single"),
+        "balance": saldo_eur,
+        "education": education_map.get(data.pendidikan, "unknown"),
+        "default": "yes" if data.has_defaulted else "no",
+        "housing": "yes" if data.has_kpr else "no",
+        "loan": "yes" if data.has_pinjaman else "no",
+        "contact": contact_type,
+        "day": day,
+        "month": month,
+        "campaign": data.campaign,
+        "pdays": data.pdays,
+        "previous": data.previous,
+        "poutcome": poutcome_map.get(data.poutcome, "unknown")
+    }])
+    return apply_feature_engineering(df_raw)
+
+def _payloads():
+    base = dict(
+        umur=35, pekerjaan="Wiraswasta", pendidikan="S1", status_pernikahan="MENIKAH",
+        saldo=25_000_000, has_kpr=True, has_pinjaman=False, has_defaulted=False,
+        last_call_date=dt.datetime(2025, 3, 12), campaign=2, previous=1, pdays=40,
+        poutcome="TIDAK TERTARIK", nomor_telepon="0812-3456-7890",
+    )
+    variants = [{}]
+    # Tepi bin pd.cut: age_group, campaign_group, balance_category (500/2000 EUR = x14000 IDR)
+    variants += [{"umur": a} for a in (1, 24, 25, 29, 30, 31, 40, 41, 50, 51, 59, 60, 61, 100, 101, 119)]
+    variants += [{"campaign": c} for c in (-1, 0, 1, 2, 3, 4, 5, 6, 100, 101)]
+    variants += [{"saldo": s} for s in (-1, 0, 1, 7_000_000, 7_000_001, 28_000_000, 28_000_001, -28_000_000)]
+    # Pembagian: previous = -1 -> campaign / 0 (inf, -inf, 0/0 = NaN); pdays = -1 / 0
+    variants += [{"previous": -1, "campaign": c} for c in (-3, 0, 4)]
+    variants += [{"pdays": p, "previous": pr} for p in (-1, 0, 1, 365) for pr in (0, 2)]
+    variants += [{"has_kpr": k, "has_pinjaman": l, "has_defaulted": d}
+                 for k in (False, True) for l in (False, True) for d in (False, True)]
+    variants += [{"last_call_date": None}]
+    variants += [{"last_call_date": dt.datetime(2024, m, 28)} for m in range(1, 13)]
+    variants += [{"nomor_telepon": n} for n in (None, "", "+6281234567", "021 5551234", "0211234", "12345")]
+    variants += [{"pekerjaan": j} for j in ("PNS", "Ibu Rumah Tangga", "Manager", "Pensiunan",
+                                             "Mahasiswa", "Buruh", "Tidak Bekerja", "Programmer")]
+    variants += [{"status_pernikahan": m} for m in ("BELUM MENIKAH", "CERAI-HIDUP", "CERAI-MATI",
+                                                     "Menikah", "Belum Menikah", "Cerai", "??")]
+    variants += [{"pendidikan": e} for e in ("SD", "SMP", "SMA", "S2", "S3", "D3")]
+    variants += [{"poutcome": p} for p in ("TERTARIK", "x")]
+    # balance ** 2 vs numpy square beda 1 ulp di sini
+    variants += [{"umur": 97, "saldo": 94259213.74677885}]
+
+    rnd = random.Random(0)
+    for _ in range(300):
+        variants.append({
+            "umur": rnd.randint(1, 119),
+            "saldo": rnd.uniform(-1e8, 1e9),
+            "campaign": rnd.randint(0, 120),
+            "previous": rnd.randint(0, 10),
+            "pdays": rnd.choice([-1, rnd.randint(0, 400)]),
+            "last_call_date": rnd.choice([None, dt.datetime(2025, rnd.randint(1, 12), rnd.randint(1, 28))]),
+        })
+    return [NasabahPayload(**{**base, **v}) for v in variants]
+
+PAYLOADS = _payloads()
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    return joblib.load(PREPROCESSOR_PATH)
+
+def _assert_same_features(actual, expected):
+    for col in expected.columns:
+        exp = expected[col]
+        act = actual[col]
+        if isinstance(exp.dtype, pd.CategoricalDtype) or exp.dtype == object:
+            exp_vals = [None if pd.isna(v) else v for v in exp.astype(object)]
+            act_vals = [None if pd.isna(v) else v for v in act.astype(object)]
+            assert act_vals == exp_vals, col
+        else:
+            # Bit-for-bit, termasuk NaN dan ±inf
+            np.testing.assert_array_equal(act.to_numpy(np.float64), exp.to_numpy(np.float64), err_msg=col)
+
+def test_schema_frame_matches_legacy_features(preprocessor):
+    schema = FeatureSchema(preprocessor.feature_names_in_)
+
+    for payload in PAYLOADS:
+        expected = legacy_prepare_features(payload)
+        actual = schema.frame(payload)
+        assert sorted(actual.columns) == sorted(expected.columns)
+        _assert_same_features(actual, expected)
+
+def test_schema_frame_matches_legacy_preprocessed(preprocessor):
+    schema = FeatureSchema(preprocessor.feature_names_in_)
+
+    for payload in PAYLOADS[::5]:
+        expected = legacy_prepare_features(payload)
+        if not np.isfinite(expected.select_dtypes("number").to_numpy(np.float64)).all():
+            continue  # ±inf ditolak preprocessor di kedua jalur
+        np.testing.assert_array_equal(
+            preprocessor.transform(schema.frame(payload)),
+            preprocessor.transform(expected),
+        )
+
+def test_schema_raw_features_hardcoded():
+    payload = NasabahPayload(
+        umur=64, pekerjaan="Pensiunan", pendidikan="SD", status_pernikahan="CERAI-MATI",
+        saldo=-3_000_000, has_pinjaman=True, has_defaulted=True,
+        last_call_date=dt.datetime(2024, 12, 1), campaign=7, previous=0, pdays=-1,
+        poutcome="TERTARIK", nomor_telepon="021 5551234",
+    )
+    row = FeatureSchema().frame(payload).iloc[0]
+    assert row[["age", "job", "marital", "education", "default", "housing", "loan"]].tolist() == [
+        64, "retired", "divorced", "primary", 1, 0, 1,
+    ]
+    assert row[["contact", "day", "month", "campaign", "pdays", "previous", "poutcome"]].tolist() == [
+        "telephone", 1, "dec", 7, -1, 0, "success",
+    ]
+    assert row["balance"] == -3_000_000 / 14000
+
+def test_schema_rejects_unknown_columns():
+    with pytest.raises(ValueError):
+        FeatureSchema(["age", "job"])
+
+def test_detect_contact_type():
+    assert detect_contact_type("0812-3456-7890") == "cellular"
+    assert detect_contact_type("+6281234567890") == "cellular"
+    assert detect_contact_type("021 5551234") == "telephone"
+    assert detect_contact_type("12345") == "unknown"
+    assert detect_contact_type(None) == "unknown"
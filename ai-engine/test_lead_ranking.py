@@ -0,0 +1,44 @@
+import pytest
+
+from lead_ranking import LeadRankingIndex
+
+ROWS = [
+    ("id-01", 0.91), ("id-02", 0.80), ("id-03", 0.80), ("id-04", 0.62),
+    ("id-05", 0.55), ("id-06", 0.40), ("id-07", None), ("id-08", 0.12),
+]
+
+def test_top_k_and_cursor_pagination():
+    index = LeadRankingIndex()
+    assert index.rebuild(ROWS) == 7
+
+    items, cursor, total = index.top(3)
+    assert [i["id_nasabah"] for i in items] == ["id-01", "id-02", "id-03"]
+    assert total == 7
+
+    items, cursor, _ = index.top(3, cursor=cursor)
+    assert [i["id_nasabah"] for i in items] == ["id-04", "id-05", "id-06"]
+
+    items, cursor, _ = index.top(3, cursor=cursor)
+    assert [i["id_nasabah"] for i in items] == ["id-08"]
+    assert cursor is None
+
+def test_segment_filter_and_cursor_survives_refresh():
+    index = LeadRankingIndex()
+    index.rebuild(ROWS)
+
+    items, cursor, total = index.top(1, segment="A")
+    assert total == 3
+    assert items[0]["id_nasabah"] == "id-01"
+
+    # Refresh di antara halaman: cursor melanjutkan dari posisi skor terakhir, bukan offset
+    index.rebuild(ROWS + [("id-00", 0.95), ("id-09", 0.85)])
+    items, _, _ = index.top(5, segment="A", cursor=cursor)
+    assert [i["id_nasabah"] for i in items] == ["id-09", "id-02", "id-03"]
+
+    items, _, _ = index.top(5, segment="C")
+    assert [i["segment"] for i in items] == ["C", "C"]
+
+    with pytest.raises(ValueError):
+        index.top(5, segment="Z")
+    with pytest.raises(ValueError):
+        index.top(5, cursor="bukan-cursor")
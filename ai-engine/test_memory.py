@@ -0,0 +1,16 @@
+from benchmark_memory import BENCH_ROWS, MEMORY_BUDGET_MB, run_isolated
+
+def test_batch_memory_budget():
+    print(f"🚀 Benchmark memori batch scoring ({BENCH_ROWS} baris)...")
+    result = run_isolated(BENCH_ROWS)
+
+    print(f"   >> Puncak RSS batch : {result['batch_peak_mb']} MB")
+    print(f"   >> Ukuran frame     : {result['frame_mb']} MB")
+
+    assert result["batch_peak_mb"] <= MEMORY_BUDGET_MB, (
+        f"Puncak RSS {result['batch_peak_mb']} MB melebihi budget {MEMORY_BUDGET_MB} MB"
+    )
+
+if __name__ == "__main__":
+    test_batch_memory_budget()
+    print("✅ Budget memori terpenuhi.")